@@ -1,10 +1,46 @@
 class MissingTokensError(Exception):
     """Отсутствие нужных ключей или токенов."""
 
+    __slots__ = ()
 
-class ApiRequestError(Exception):
+
+class InvalidPeriodError(Exception):
+    """Некорректные интервалы опроса API."""
+
+    __slots__ = ()
+
+
+class ApiError(Exception):
+    """Базовая ошибка при работе с API домашки."""
+
+    __slots__ = ()
+
+
+class ApiRequestError(ApiError):
     """Ошибка при получении данных от API."""
 
+    __slots__ = ()
+
+
+class ApiResponseError(ApiError):
+    """Ответ API не соответствует ожидаемому."""
 
-class HomeworkStatusError(KeyError):
+    __slots__ = ()
+
+
+class ApiResponseKeyError(KeyError, ApiResponseError):
+    """В ответе API нет необходимых ключей."""
+
+    __slots__ = ()
+
+
+class ApiResponseTypeError(TypeError, ApiResponseError):
+    """Тип данных в ответе API не соответствует ожидаемому."""
+
+    __slots__ = ()
+
+
+class HomeworkStatusError(ApiError):
     """Статус домашней работы не соответствует ожидаемому."""
+
+    __slots__ = ()
@@ -1,10 +1,16 @@
 import logging
+import logging.handlers
 import os
+import queue
+import signal
 import sys
+import threading
 import time
 from http import HTTPStatus
 
+import orjson
 import requests
+import urllib3
 from dotenv import load_dotenv
 from telebot import TeleBot  # type: ignore
 from telebot.apihelper import ApiException  # type: ignore
@@ -18,66 +24,145 @@ TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
 TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
 
 RETRY_PERIOD = 600
+_POLL_MIN = os.getenv('POLL_MIN', '60')
+_POLL_MAX = os.getenv('POLL_MAX', '1800')
+MIN_PERIOD = int(_POLL_MIN) if _POLL_MIN.isdigit() else None
+MAX_PERIOD = int(_POLL_MAX) if _POLL_MAX.isdigit() else None
+ERROR_PERIOD = 60
 TIME_GAP = 1
 ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
-HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
+HEADERS = {
+    'Authorization': f'OAuth {PRACTICUM_TOKEN}',
+    **urllib3.make_headers(accept_encoding=True)
+}
 HOMEWORK_VERDICTS = {
     'approved': 'Работа проверена: ревьюеру всё понравилось. Ура!',
     'reviewing': 'Работа взята на проверку ревьюером.',
     'rejected': 'Работа проверена: у ревьюера есть замечания.'
 }
+_REQUIRED_KEYS = frozenset(('homeworks', 'current_date'))
+_MSG_TEMPLATE = 'Изменился статус проверки работы "{}". {}'.format
+REQUEST_TIMEOUT = urllib3.Timeout(connect=5, read=30)
+REQUEST_RETRIES = urllib3.Retry(
+    total=3,
+    backoff_factor=1,
+    status_forcelist=(
+        HTTPStatus.BAD_GATEWAY,
+        HTTPStatus.SERVICE_UNAVAILABLE,
+        HTTPStatus.GATEWAY_TIMEOUT
+    ),
+    raise_on_status=False,
+    respect_retry_after_header=False
+)
+TELEGRAM_QUEUE_SIZE = 100
+TELEGRAM_RETRY_DELAY = 2
+TELEGRAM_MAX_ATTEMPTS = 4
+TELEGRAM_MESSAGE_LIMIT = 4000
+
+HTTP_POOL = urllib3.PoolManager(
+    num_pools=1, maxsize=2, retries=REQUEST_RETRIES
+)
+_etag_cache = {'current': None, 'received': None}
+
+_tg_queue = queue.Queue(maxsize=TELEGRAM_QUEUE_SIZE)
 
 log_filename = os.path.basename(__file__) + '.log'
+LOG_BUFFER_CAPACITY = 100
+LOG_MAX_BYTES = 5_000_000
+LOG_BACKUP_COUNT = 3
 
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
 
-file_handler = logging.FileHandler(log_filename)
-file_handler.setLevel(logging.DEBUG)
 
-stream_handler = logging.StreamHandler(stream=sys.stdout)
-stream_handler.setLevel(logging.DEBUG)
-
-formatter = logging.Formatter(
-    '%(asctime)s - %(levelname)s - %(message)s'
-)
-file_handler.setFormatter(formatter)
-stream_handler.setFormatter(formatter)
+def _configure_logging():
+    """Настраивает обработчики логов бота один раз за процесс."""
+    if logger.handlers:
+        return
+    logger.setLevel(logging.DEBUG)
+
+    file_handler = logging.handlers.RotatingFileHandler(
+        log_filename,
+        maxBytes=LOG_MAX_BYTES,
+        backupCount=LOG_BACKUP_COUNT
+    )
+    file_handler.setLevel(logging.DEBUG)
+    buffered_file_handler = logging.handlers.MemoryHandler(
+        capacity=LOG_BUFFER_CAPACITY,
+        flushLevel=logging.WARNING,
+        target=file_handler
+    )
+
+    stream_handler = logging.StreamHandler(stream=sys.stdout)
+    stream_handler.setLevel(logging.DEBUG)
+
+    formatter = logging.Formatter(
+        '%(asctime)s - %(levelname)s - %(message)s'
+    )
+    file_handler.setFormatter(formatter)
+    stream_handler.setFormatter(formatter)
+
+    logger.addHandler(buffered_file_handler)
+    logger.addHandler(stream_handler)
+
+
+def _stop(signum, frame):
+    """Останавливает бота по сигналу так, чтобы буфер логов сохранился."""
+    logger.info('Получен сигнал %s, бот останавливается.', signum)
+    pending = _tg_queue.qsize()
+    if pending:
+        logger.warning(
+            'Бот остановлен, не отправлено сообщений в Telegram: %s',
+            pending
+        )
+    sys.exit(0)
 
-logger.addHandler(file_handler)
-logger.addHandler(stream_handler)
 
+def log_and_raise(exception, message, *args, level=logging.ERROR):
+    """Логирует сообщение и выбрасывает исключение.
 
-def log_and_raise(message, exception, level=logging.ERROR):
-    """Логирует сообщение и выбрасывает исключение."""
-    logger.log(level, message)
-    raise exception(message)
+    Аргументы подставляются в сообщение лениво, в стиле `logging`.
+    """
+    logger.log(level, message, *args)
+    raise exception(message % args if args else message)
 
 
 def check_tokens():
     """Проверяет доступность переменных окружения."""
-    required_tokens = {
-        'PRACTICUM_TOKEN': PRACTICUM_TOKEN,
-        'TELEGRAM_TOKEN': TELEGRAM_TOKEN,
-        'TELEGRAM_CHAT_ID': TELEGRAM_CHAT_ID
-    }
-
-    missing_tokens = [
-        key for key, value in required_tokens.items() if value is None
-    ]
-    missing_tokens_string = ', '.join(missing_tokens)
+    required_tokens = (
+        ('PRACTICUM_TOKEN', PRACTICUM_TOKEN),
+        ('TELEGRAM_TOKEN', TELEGRAM_TOKEN),
+        ('TELEGRAM_CHAT_ID', TELEGRAM_CHAT_ID)
+    )
+    missing_tokens = [name for name, value in required_tokens if not value]
 
     if missing_tokens:
         log_and_raise(
-            f'Отсутствуют необходимые переменные окружения: '
-            f'{missing_tokens_string}',
             ex.MissingTokensError,
+            'Отсутствуют необходимые переменные окружения: %s',
+            ', '.join(missing_tokens),
             level=logging.CRITICAL
         )
     else:
         logger.debug('Все необходимые переменные окружения в наличии.')
 
 
+def check_periods():
+    """Проверяет интервалы опроса API из переменных окружения."""
+    if (
+        MIN_PERIOD is None
+        or MAX_PERIOD is None
+        or not 0 < MIN_PERIOD <= MAX_PERIOD
+    ):
+        log_and_raise(
+            ex.InvalidPeriodError,
+            'Некорректные интервалы опроса API: POLL_MIN=%s, POLL_MAX=%s. '
+            'Ожидаются целые числа 0 < POLL_MIN <= POLL_MAX.',
+            _POLL_MIN,
+            _POLL_MAX,
+            level=logging.CRITICAL
+        )
+
+
 def send_message(bot, message):
     """Отправляет сообщение в Telegram."""
     try:
@@ -86,71 +171,144 @@ def send_message(bot, message):
             text=message
         )
     except ApiException as api_error:
-        logger.exception(f'Ошибка API Telegram: {api_error}')
+        logger.exception('Ошибка API Telegram: %s', api_error)
         return False
     except requests.RequestException as request_error:
-        logger.exception(f'Ошибка запроса к Telegram: {request_error}')
+        logger.exception('Ошибка запроса к Telegram: %s', request_error)
         return False
     except Exception as error:
-        logger.exception(f'Сбой при отправке сообщения в Telegram: {error}')
+        logger.exception('Сбой при отправке сообщения в Telegram: %s', error)
         return False
     else:
         logger.debug('Сообщение успешно отправлено в Telegram.')
         return True
 
 
+def enqueue_message(message):
+    """Ставит сообщение в очередь на отправку в Telegram."""
+    try:
+        _tg_queue.put_nowait(message)
+    except queue.Full:
+        logger.warning(
+            'Очередь сообщений в Telegram переполнена, '
+            'сообщение отброшено: %s',
+            message
+        )
+        return False
+    return True
+
+
+def _telegram_worker(bot):
+    """Отправляет в Telegram сообщения из очереди."""
+    while True:
+        message = _tg_queue.get()
+        if message is None:
+            break
+        for attempt in range(1, TELEGRAM_MAX_ATTEMPTS + 1):
+            if send_message(bot, message):
+                break
+            if attempt < TELEGRAM_MAX_ATTEMPTS:
+                delay = TELEGRAM_RETRY_DELAY * 2 ** (attempt - 1)
+                logger.warning(
+                    'Не удалось отправить сообщение в Telegram. '
+                    'Повторная попытка через %s секунд.',
+                    delay
+                )
+                time.sleep(delay)
+        else:
+            logger.error(
+                'Сообщение не отправлено в Telegram после %s попыток: %s',
+                TELEGRAM_MAX_ATTEMPTS,
+                message
+            )
+
+
 def get_api_answer(timestamp):
-    """Получает данные от API."""
+    """Получает данные от API.
+
+    Возвращает None, если ответ не изменился с прошлого запроса.
+    """
+    etag = _etag_cache['current']
+    headers = HEADERS
+    if etag is not None:
+        headers = {**HEADERS, 'If-None-Match': etag}
     request_params = {
+        'method': 'GET',
         'url': ENDPOINT,
-        'headers': HEADERS,
-        'params': {'from_date': timestamp}
+        'headers': headers,
+        'fields': {'from_date': timestamp},
+        'timeout': REQUEST_TIMEOUT
     }
     try:
-        response = requests.get(**request_params)
-    except requests.RequestException as error:
+        response = HTTP_POOL.request(**request_params)
+    except urllib3.exceptions.HTTPError as error:
         log_and_raise(
-            f'Недоступность эндпоинта: {error}. '
-            f'Параметры запроса: {request_params}',
-            ex.ApiRequestError
+            ex.ApiRequestError,
+            'Недоступность эндпоинта: %s. Параметры запроса: %r',
+            error,
+            request_params
         )
-    status_response = response.status_code
+    status_response = response.status
+    if status_response == HTTPStatus.NOT_MODIFIED:
+        logger.debug('Ответ API не изменился с прошлого запроса.')
+        _etag_cache['received'] = etag
+        return None
     if status_response != HTTPStatus.OK:
         log_and_raise(
-            f'Ошибка при получении данных от API: '
-            f'Статус ответа {status_response}. '
-            f'Параметры запроса: {request_params}',
-            ex.ApiRequestError
+            ex.ApiRequestError,
+            'Ошибка при получении данных от API: '
+            'Статус ответа %s. Параметры запроса: %r',
+            status_response,
+            request_params
+        )
+    try:
+        api_answer = orjson.loads(response.data)
+    except orjson.JSONDecodeError as error:
+        log_and_raise(
+            ex.ApiRequestError,
+            'Невалидный JSON в ответе API: %s',
+            error
         )
-    return response.json()
+    _etag_cache['received'] = response.headers.get('ETag')
+    return api_answer
+
+
+def _commit_etag():
+    """Запоминает ETag ответа API, который был успешно обработан."""
+    _etag_cache['current'] = _etag_cache['received']
 
 
 def check_response(response):
     """Проверяет ответ API."""
     if not isinstance(response, dict):
-        type_response = type(response)
         log_and_raise(
-            f'Структура ответа API не соответсвует ожидаемой. '
-            f'Полученный тип данных: {type_response}.',
-            TypeError
+            ex.ApiResponseTypeError,
+            'Структура ответа API не соответсвует ожидаемой. '
+            'Полученный тип данных: %s.',
+            type(response)
         )
 
-    required_keys = ['homeworks', 'current_date']
-    missing_keys = [key for key in required_keys if key not in response]
-    missing_keys_string = ', '.join(missing_keys)
+    missing_keys = _REQUIRED_KEYS.difference(response)
 
     if missing_keys:
         log_and_raise(
-            f'Ответ API не содержит необходимые ключи: '
-            f'{missing_keys_string}',
-            KeyError
+            ex.ApiResponseKeyError,
+            'Ответ API не содержит необходимые ключи: %s',
+            ', '.join(sorted(missing_keys))
+        )
+    if type(response['homeworks']) is not list:
+        log_and_raise(
+            ex.ApiResponseTypeError,
+            'Тип данных под ключом "homeworks" не соответсвует ожидаемому. '
+            'Полученный тип данных: %s.',
+            type(response['homeworks'])
         )
-    if not isinstance(response['homeworks'], list):
-        type_homeworks = type(response['homeworks'])
+    if type(response['current_date']) is not int:
         log_and_raise(
-            f'Тип данных под ключом "homeworks" не соответсвует ожидаемому. '
-            f'Полученный тип данных: {type_homeworks}.',
-            TypeError
+            ex.ApiResponseTypeError,
+            'Тип данных под ключом "current_date" не соответсвует '
+            'ожидаемому. Полученный тип данных: %s.',
+            type(response['current_date'])
         )
 
     logger.debug('Ответ API содержит все необходимые ключи.')
@@ -158,58 +316,100 @@ def check_response(response):
 
 def parse_status(homework):
     """Получаю информацию о конкретной домашней работе."""
-    if 'homework_name' not in homework:
+    if not isinstance(homework, dict):
         log_and_raise(
-            'Ответ API не содержит ключ "homework_name".',
-            ex.HomeworkStatusError
+            ex.HomeworkStatusError,
+            'Домашняя работа в ответе API не является словарём: %r',
+            homework
         )
-    homework_name = homework['homework_name']
-    homework_status = homework.get('status')
-    if homework_status not in HOMEWORK_VERDICTS:
+    try:
+        homework_name = homework['homework_name']
+    except KeyError:
         log_and_raise(
-            f'Неизвестный статус домашней работы: {homework_status}',
-            ex.HomeworkStatusError
+            ex.HomeworkStatusError,
+            'Ответ API не содержит ключ "homework_name".'
         )
-    else:
-        verdict = HOMEWORK_VERDICTS[homework_status]
-    return f'Изменился статус проверки работы "{homework_name}". {verdict}'
+    try:
+        verdict = HOMEWORK_VERDICTS[homework['status']]
+    except (KeyError, TypeError):
+        log_and_raise(
+            ex.HomeworkStatusError,
+            'Неизвестный статус домашней работы: %s',
+            homework.get('status')
+        )
+    return _MSG_TEMPLATE(homework_name, verdict)
+
+
+def _parse_homeworks(homeworks):
+    """Разбирает домашние работы по одной, не прерываясь на ошибках."""
+    for homework in homeworks:
+        try:
+            yield parse_status(homework)
+        except ex.HomeworkStatusError as error:
+            yield f'Ошибка в работе программы: {error}'
+
+
+def join_messages(messages):
+    """Объединяет сообщения в блоки в пределах лимита Telegram."""
+    buffer = ''
+    for message in messages:
+        if buffer and len(buffer) + len(message) > TELEGRAM_MESSAGE_LIMIT:
+            yield buffer.rstrip()
+            buffer = ''
+        while len(message) > TELEGRAM_MESSAGE_LIMIT:
+            yield message[:TELEGRAM_MESSAGE_LIMIT]
+            message = message[TELEGRAM_MESSAGE_LIMIT:]
+        buffer += message + '\n\n'
+    if buffer:
+        yield buffer.rstrip()
 
 
 def main():
     """Основная логика работы бота."""
+    _configure_logging()
+    signal.signal(signal.SIGTERM, _stop)
     check_tokens()
+    check_periods()
     bot = TeleBot(token=TELEGRAM_TOKEN)
+    threading.Thread(
+        target=_telegram_worker, args=(bot,), daemon=True
+    ).start()
     timestamp = int(time.time())
-    error_reported = False
+    last_error = None
+    current_period = min(max(RETRY_PERIOD, MIN_PERIOD), MAX_PERIOD)
 
     while True:
+        started = time.monotonic()
         try:
             response = get_api_answer(timestamp)
-            check_response(response)
-            homeworks = response['homeworks']
+            if response is None:
+                homeworks, next_timestamp = [], timestamp
+            else:
+                check_response(response)
+                homeworks = response['homeworks']
+                next_timestamp = response['current_date'] - TIME_GAP
             if homeworks:
-                message = parse_status(homeworks[0])
-                success = send_message(bot, message)
-                if not success:
-                    logger.warning(
-                        'Не удалось отправить сообщение в Telegram.'
-                        'Повторная попытка через 60 секунд.'
-                    )
-                    time.sleep(60)
-                    continue
+                current_period = MIN_PERIOD
+                for message in join_messages(_parse_homeworks(homeworks)):
+                    enqueue_message(message)
             else:
+                current_period = min(current_period * 2, MAX_PERIOD)
                 logger.debug('Отсутствие в ответе новых статусов.')
 
-            timestamp = int(time.time()) - TIME_GAP
-            error_reported = False
-        except Exception as error:
-            logger.exception(f'Сбой в работе программы: {error}')
-            if not error_reported:
-                error_message = f'Ошибка в работе программы: {error}'
-                send_message(bot, error_message)
-                error_reported = True
-
-        time.sleep(RETRY_PERIOD)
+            timestamp = next_timestamp
+            _commit_etag()
+            last_error = None
+            sleep_period = current_period
+        except ex.ApiError as error:
+            logger.exception('Сбой в работе программы: %s', error)
+            error_key = (type(error), type(error.__context__))
+            if error_key != last_error:
+                enqueue_message(f'Ошибка в работе программы: {error}')
+                last_error = error_key
+            sleep_period = min(current_period, ERROR_PERIOD)
+
+        delay = max(0, sleep_period - (time.monotonic() - started))
+        time.sleep(delay)
 
 
 if __name__ == '__main__':
@@ -1,3 +1,4 @@
+import json
 import logging
 import re
 import signal
@@ -88,23 +89,17 @@ class MockResponseGET:
             data=None, **kwargs
     ):
         self.random_timestamp = random_timestamp
-        self.status_code = http_status
-        self.reason = ''
-        self.text = ''
+        self.status = http_status
+        self.headers = {}
         default_data = {
             'homeworks': [],
             'current_date': self.random_timestamp
         }
-        self.data = data if data is not None else default_data
+        self.data = json.dumps(
+            data if data is not None else default_data
+        ).encode()
         logging.warn(MockResponseGET.CALLED_LOG_MSG)
 
-    def json(self):
-        return self.data
-
-    def raise_for_status(self):
-        if self.status_code >= 400:
-            raise ValueError('Server or client error.')
-
 
 class MockTelegramBot:
     def __init__(self, *args, **kwargs):
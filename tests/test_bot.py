@@ -1,13 +1,16 @@
 import inspect
 import logging
 import platform
+import queue
 import re
+import signal
 import time
+import types
 from http import HTTPStatus
 
 import pytest
-import requests
 import telebot
+import urllib3
 
 import tests.check_utils as check_utils
 
@@ -48,10 +51,13 @@ class TestHomework:
                           'ENDPOINT', 'HEADERS', 'HOMEWORK_VERDICTS')
     HOMEWORK_FUNC_WITH_PARAMS_QTY = {
         'send_message': 2,
+        'enqueue_message': 1,
+        'join_messages': 1,
         'get_api_answer': 1,
         'check_response': 1,
         'parse_status': 1,
         'check_tokens': 0,
+        'check_periods': 0,
         'main': 0
     }
     RETRY_PERIOD = 600
@@ -84,6 +90,13 @@ class TestHomework:
                 'current_date': 123246
             },
             None
+        ),
+        'current_date_not_int': check_utils.InvalidResponse(
+            {
+                'homeworks': [],
+                'current_date': None
+            },
+            None
         )
     }
     NOT_OK_RESPONSES = {
@@ -167,8 +180,11 @@ class TestHomework:
         )
 
         def check_request_call(
-                url, current_timestamp=current_timestamp, **kwargs
+                method, url, current_timestamp=current_timestamp, **kwargs
         ):
+            assert method == 'GET', (
+                'Проверьте, что к API отправляется GET-запрос.'
+            )
             expected_url = (
                 'https://practicum.yandex.ru/api/user_api/homework_statuses'
             )
@@ -186,15 +202,19 @@ class TestHomework:
                 'Проверьте, что заголовок `Authorization` '
                 'начинается с `OAuth`.'
             )
-            assert 'params' in kwargs, (
-                'Проверьте, что в запросе переданы параметры `params`.'
+            assert 'accept-encoding' in map(str.lower, kwargs['headers']), (
+                'Проверьте, что в заголовках запроса передано поле '
+                '`Accept-Encoding`, чтобы ответ приходил сжатым.'
+            )
+            assert 'fields' in kwargs, (
+                'Проверьте, что в запросе переданы параметры `fields`.'
             )
-            assert 'from_date' in kwargs['params'], (
+            assert 'from_date' in kwargs['fields'], (
                 'Проверьте, что в параметрах к запросу передан параметр '
                 '`from_date`.'
             )
             try:
-                from_date = int(kwargs['params']['from_date'])
+                from_date = int(kwargs['fields']['from_date'])
                 assert from_date == int(current_timestamp), (
                     'Проверьте, что в параметре `from_date` передан timestamp.'
                 )
@@ -203,7 +223,9 @@ class TestHomework:
                     'Проверьте, что в параметре `from_date` передано число.'
                 )
 
-        monkeypatch.setattr(requests, 'get', check_request_call)
+        monkeypatch.setattr(
+            homework_module.HTTP_POOL, 'request', check_request_call
+        )
         try:
             homework_module.get_api_answer(current_timestamp)
         except AssertionError:
@@ -228,13 +250,46 @@ class TestHomework:
                 current_timestamp=current_timestamp, **kwargs
             )
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
+        monkeypatch.setattr(
+            homework_module.HTTP_POOL, 'request', mock_response_get
+        )
 
         result = homework_module.get_api_answer(current_timestamp)
         assert isinstance(result, dict), (
             f'Проверьте, что функция `{func_name}` возвращает словарь.'
         )
 
+    def test_get_api_answer_not_modified(
+            self, monkeypatch, random_timestamp, current_timestamp,
+            homework_module
+    ):
+        func_name = 'get_api_answer'
+        etag = '"homework-statuses"'
+        sent_headers = {}
+
+        def mock_response_not_modified(*args, **kwargs):
+            sent_headers.update(kwargs['headers'])
+            return check_utils.MockResponseGET(
+                *args, random_timestamp=random_timestamp,
+                http_status=HTTPStatus.NOT_MODIFIED, **kwargs
+            )
+
+        monkeypatch.setattr(
+            homework_module, '_etag_cache', {'current': etag, 'received': None}
+        )
+        monkeypatch.setattr(
+            homework_module.HTTP_POOL, 'request', mock_response_not_modified
+        )
+        result = homework_module.get_api_answer(current_timestamp)
+        assert sent_headers.get('If-None-Match') == etag, (
+            f'Проверьте, что функция `{func_name}` передаёт сохранённый '
+            '`ETag` в заголовке `If-None-Match`.'
+        )
+        assert result is None, (
+            f'Проверьте, что функция `{func_name}` возвращает `None`, '
+            'если API домашки отвечает `304 Not Modified`.'
+        )
+
     @pytest.mark.parametrize('response', NOT_OK_RESPONSES.values())
     def test_get_not_200_status_response(
             self, monkeypatch, current_timestamp, response, homework_module
@@ -246,7 +301,7 @@ class TestHomework:
             self.HOMEWORK_FUNC_WITH_PARAMS_QTY[func_name]
         )
 
-        monkeypatch.setattr(requests, 'get', response)
+        monkeypatch.setattr(homework_module.HTTP_POOL, 'request', response)
         try:
             homework_module.get_api_answer(current_timestamp)
         except Exception:
@@ -268,16 +323,20 @@ class TestHomework:
         )
 
         def mock_request_get_with_exception(*args, **kwargs):
-            raise requests.RequestException('Something wrong')
+            raise urllib3.exceptions.HTTPError('Something wrong')
 
-        monkeypatch.setattr(requests, 'get', mock_request_get_with_exception)
+        monkeypatch.setattr(
+            homework_module.HTTP_POOL,
+            'request',
+            mock_request_get_with_exception
+        )
         try:
             homework_module.get_api_answer(current_timestamp)
-        except requests.RequestException as e:
+        except urllib3.exceptions.HTTPError as e:
             raise AssertionError(
                 f'Убедитесь, что в функции `{func_name}` обрабатывается '
                 'ситуация, когда при запросе к API возникает исключение '
-                '`requests.RequestException`.'
+                '`urllib3.exceptions.HTTPError`.'
             ) from e
         except Exception:
             pass
@@ -495,6 +554,57 @@ class TestHomework:
                 'метод бота `send_message`.'
             )
 
+    def test_enqueue_message(self, monkeypatch, homework_module):
+        message_queue = queue.Queue(maxsize=1)
+        monkeypatch.setattr(homework_module, '_tg_queue', message_queue)
+
+        homework_module.enqueue_message('Test_message_check')
+        assert message_queue.get_nowait() == 'Test_message_check', (
+            'Убедитесь, что сообщение ставится в очередь на отправку.'
+        )
+        homework_module.enqueue_message('Test_message_check')
+        try:
+            homework_module.enqueue_message('Another_message')
+        except queue.Full as e:
+            raise AssertionError(
+                'Убедитесь, что переполнение очереди сообщений не '
+                'останавливает работу бота.'
+            ) from e
+
+    def test_join_messages(self, homework_module):
+        func_name = 'join_messages'
+        check_utils.check_function(
+            homework_module,
+            func_name,
+            self.HOMEWORK_FUNC_WITH_PARAMS_QTY[func_name]
+        )
+
+        limit = homework_module.TELEGRAM_MESSAGE_LIMIT
+        messages = ['a' * (limit // 2), 'b' * (limit // 2), 'c']
+        long_message = 'd' * (limit * 2 + 1)
+        long_chunks = list(homework_module.join_messages([long_message]))
+        assert all(len(chunk) <= limit for chunk in long_chunks), (
+            f'Убедитесь, что функция `{func_name}` разбивает слишком '
+            'длинное сообщение на части в пределах лимита Telegram.'
+        )
+        assert ''.join(long_chunks) == long_message, (
+            f'Убедитесь, что функция `{func_name}` не теряет текст '
+            'длинного сообщения.'
+        )
+        result = list(homework_module.join_messages(messages))
+        assert all(len(chunk) <= limit for chunk in result), (
+            f'Убедитесь, что функция `{func_name}` не превышает '
+            'лимит длины сообщения Telegram.'
+        )
+        assert all(
+            any(message in chunk for chunk in result) for message in messages
+        ), (
+            f'Убедитесь, что функция `{func_name}` не теряет сообщения.'
+        )
+        assert len(result) < len(messages), (
+            f'Убедитесь, что функция `{func_name}` объединяет сообщения.'
+        )
+
     def test_bot_initialized_in_main(self, homework_module):
         func_name = 'main'
         check_utils.check_function(
@@ -559,13 +669,25 @@ class TestHomework:
             if caller != 'main':
                 old_sleep(secs)
                 return
-            assert secs == 600, (
-                'Убедитесь, что повторный запрос к API домашки отправляется '
-                'через 10 минут: `time.sleep(RETRY_PERIOD)`.'
+            assert 0 <= secs <= homework_module.MAX_PERIOD, (
+                'Убедитесь, что интервал между запросами к API домашки '
+                'не превышает `MAX_PERIOD`.'
             )
             raise check_utils.BreakInfiniteLoop('break')
 
         monkeypatch.setattr(time, 'sleep', sleep_to_interrupt)
+        monkeypatch.setattr(homework_module, '_tg_queue', queue.Queue())
+        monkeypatch.setattr(
+            homework_module,
+            'signal',
+            types.SimpleNamespace(
+                signal=lambda signum, handler: None,
+                SIGTERM=signal.SIGTERM
+            )
+        )
+        monkeypatch.setattr(
+            homework_module, '_telegram_worker', lambda bot: None
+        )
         if mock_bot:
             def mock_telegram_bot(random_message=random_message, *args,
                                   **kwargs):
@@ -595,8 +717,8 @@ class TestHomework:
                 data=response_data
             ))
         monkeypatch.setattr(
-            requests,
-            'get',
+            homework_module.HTTP_POOL,
+            'request',
             mock_response_get_with_new_status
         )
         if platform.system() != 'Windows':
@@ -658,7 +780,8 @@ class TestHomework:
                     )
                 ]
                 assert log_record, (
-                    'Убедитесь, что бот использует функцию `requests.get()` '
+                    'Убедитесь, что бот использует метод '
+                    '`HTTP_POOL.request()` '
                     'для отправки запроса к API домашки.'
                 )
 
@@ -725,13 +848,13 @@ class TestHomework:
 
         hw_status = data_with_new_hw_status['homeworks'][0]['status']
 
-        def mock_send_message(bot, message=''):
+        def mock_enqueue_message(message=''):
             logging.warn(message)
 
         monkeypatch.setattr(
             homework_module,
-            'send_message',
-            mock_send_message
+            'enqueue_message',
+            mock_enqueue_message
         )
         with caplog.at_level(logging.WARN):
             try:
@@ -751,6 +874,337 @@ class TestHomework:
                     f'Вызов функции `main` завершился ошибкой: {e}'
                 ) from e
 
+    def test_main_send_message_with_invalid_homework(
+            self, monkeypatch, random_timestamp, current_timestamp,
+            random_message, homework_module, data_with_new_hw_status
+    ):
+        data_with_new_hw_status['homeworks'].extend((
+            {'homework_name': 'hw_bad', 'status': 'unknown'},
+            'hw_not_a_dict'
+        ))
+        self.mock_main(
+            monkeypatch,
+            random_message,
+            random_timestamp,
+            current_timestamp,
+            homework_module,
+            response_data=data_with_new_hw_status
+        )
+        hw_status = data_with_new_hw_status['homeworks'][0]['status']
+        messages = []
+        monkeypatch.setattr(
+            homework_module, 'enqueue_message', messages.append
+        )
+
+        try:
+            homework_module.main()
+        except check_utils.BreakInfiniteLoop:
+            pass
+        sent = '\n'.join(messages)
+        assert self.HOMEWORK_VERDICTS[hw_status] in sent, (
+            'Убедитесь, что ошибка в одной домашней работе не мешает '
+            'отправить статусы остальных работ из того же ответа API.'
+        )
+        assert 'unknown' in sent, (
+            'Убедитесь, что бот сообщает об ошибке разбора домашней работы.'
+        )
+        assert 'hw_not_a_dict' in sent, (
+            'Убедитесь, что бот сообщает об ошибке разбора домашней работы, '
+            'которая пришла не в виде словаря.'
+        )
+
+    @pytest.mark.parametrize('homework', (
+        'hw123',
+        {'homework_name': 'hw123', 'status': ['approved']},
+    ))
+    def test_main_survives_malformed_homework(
+            self, monkeypatch, random_timestamp, current_timestamp,
+            random_message, homework_module, homework
+    ):
+        self.mock_main(
+            monkeypatch,
+            random_message,
+            random_timestamp,
+            current_timestamp,
+            homework_module,
+            response_data={
+                'homeworks': [homework],
+                'current_date': random_timestamp
+            }
+        )
+        messages = []
+        monkeypatch.setattr(
+            homework_module, 'enqueue_message', messages.append
+        )
+
+        try:
+            homework_module.main()
+        except check_utils.BreakInfiniteLoop:
+            pass
+        except (Exception, SystemExit) as e:
+            raise AssertionError(
+                'Убедитесь, что бот не останавливает работу, если в ответе '
+                'API домашки пришла домашняя работа неожиданного формата.'
+            ) from e
+        assert messages, (
+            'Убедитесь, что бот сообщает об ошибке разбора домашней работы '
+            'неожиданного формата.'
+        )
+
+    def test_main_reports_repeated_error_after_recovery(
+            self, monkeypatch, random_timestamp, current_timestamp,
+            random_message, homework_module
+    ):
+        self.mock_main(
+            monkeypatch,
+            random_message,
+            random_timestamp,
+            current_timestamp,
+            homework_module
+        )
+        error = homework_module.ex.ApiRequestError('Something wrong')
+        answers = iter((
+            error,
+            {'homeworks': [], 'current_date': random_timestamp},
+            error
+        ))
+
+        def mock_get_api_answer(timestamp):
+            answer = next(answers)
+            if isinstance(answer, Exception):
+                raise answer
+            return answer
+
+        sleeps = []
+
+        def sleep_to_interrupt(secs):
+            sleeps.append(secs)
+            if len(sleeps) == 3:
+                raise check_utils.BreakInfiniteLoop('break')
+
+        monkeypatch.setattr(
+            homework_module, 'get_api_answer', mock_get_api_answer
+        )
+        monkeypatch.setattr(time, 'sleep', sleep_to_interrupt)
+
+        try:
+            homework_module.main()
+        except check_utils.BreakInfiniteLoop:
+            pass
+        message_queue = homework_module._tg_queue
+        error_messages = []
+        while not message_queue.empty():
+            message = message_queue.get_nowait()
+            if str(error) in message:
+                error_messages.append(message)
+        assert len(error_messages) == 2, (
+            'Убедитесь, что бот снова сообщает об ошибке, если она '
+            'повторилась после успешного запроса к API.'
+        )
+
+    def test_main_refetches_after_processing_error(
+            self, monkeypatch, random_timestamp, current_timestamp,
+            random_message, homework_module
+    ):
+        self.mock_main(
+            monkeypatch,
+            random_message,
+            random_timestamp,
+            current_timestamp,
+            homework_module
+        )
+        monkeypatch.setattr(
+            homework_module, '_etag_cache', {'current': None, 'received': None}
+        )
+        sent_headers = []
+
+        def mock_response_with_etag(*args, **kwargs):
+            sent_headers.append(kwargs['headers'])
+            response = check_utils.MockResponseGET(
+                *args, random_timestamp=random_timestamp,
+                data={'homeworks': []}, **kwargs
+            )
+            response.headers = {'ETag': '"v1"'}
+            return response
+
+        def sleep_to_interrupt(secs):
+            if len(sent_headers) == 2:
+                raise check_utils.BreakInfiniteLoop('break')
+
+        monkeypatch.setattr(
+            homework_module.HTTP_POOL, 'request', mock_response_with_etag
+        )
+        monkeypatch.setattr(time, 'sleep', sleep_to_interrupt)
+
+        try:
+            homework_module.main()
+        except check_utils.BreakInfiniteLoop:
+            pass
+        assert len(sent_headers) == 2, (
+            'Убедитесь, что после ошибки обработки ответа бот повторяет '
+            'запрос к API домашки.'
+        )
+        assert 'If-None-Match' not in sent_headers[1], (
+            'Убедитесь, что `ETag` ответа, который не удалось обработать, '
+            'не передаётся в следующем запросе к API домашки.'
+        )
+
+    def test_main_uses_server_timestamp_and_paces_polls(
+            self, monkeypatch, random_timestamp, current_timestamp,
+            random_message, homework_module
+    ):
+        self.mock_main(
+            monkeypatch,
+            random_message,
+            random_timestamp,
+            current_timestamp,
+            homework_module
+        )
+        work_time = 10
+        clock = iter(range(0, 1000, work_time))
+        requested_timestamps = []
+        sleeps = []
+
+        def mock_get_api_answer(timestamp):
+            requested_timestamps.append(timestamp)
+            return {'homeworks': [], 'current_date': random_timestamp}
+
+        def sleep_to_interrupt(secs):
+            sleeps.append(secs)
+            if len(sleeps) == 2:
+                raise check_utils.BreakInfiniteLoop('break')
+
+        monkeypatch.setattr(
+            homework_module, 'get_api_answer', mock_get_api_answer
+        )
+        monkeypatch.setattr(time, 'monotonic', lambda: next(clock))
+        monkeypatch.setattr(time, 'sleep', sleep_to_interrupt)
+
+        try:
+            homework_module.main()
+        except check_utils.BreakInfiniteLoop:
+            pass
+        assert requested_timestamps[1] == (
+            random_timestamp - homework_module.TIME_GAP
+        ), (
+            'Убедитесь, что следующий запрос к API домашки отправляется '
+            'с `from_date`, равным `current_date - TIME_GAP`.'
+        )
+        assert sleeps[0] == (
+            min(homework_module.RETRY_PERIOD * 2, homework_module.MAX_PERIOD)
+            - work_time
+        ), (
+            'Убедитесь, что время обработки ответа вычитается из '
+            'интервала ожидания до следующего запроса.'
+        )
+
+    def test_main_reports_error_streak_once(
+            self, monkeypatch, random_timestamp, current_timestamp,
+            random_message, homework_module
+    ):
+        self.mock_main(
+            monkeypatch,
+            random_message,
+            random_timestamp,
+            current_timestamp,
+            homework_module
+        )
+        attempts = []
+
+        def mock_get_api_answer(timestamp):
+            attempts.append(timestamp)
+            try:
+                raise urllib3.exceptions.HTTPError(
+                    f'Connection object at 0x{len(attempts):x}'
+                )
+            except urllib3.exceptions.HTTPError as error:
+                raise homework_module.ex.ApiRequestError(
+                    f'Недоступность эндпоинта: {error}'
+                )
+
+        def sleep_to_interrupt(secs):
+            if len(attempts) == 2:
+                raise check_utils.BreakInfiniteLoop('break')
+
+        monkeypatch.setattr(
+            homework_module, 'get_api_answer', mock_get_api_answer
+        )
+        monkeypatch.setattr(time, 'sleep', sleep_to_interrupt)
+
+        try:
+            homework_module.main()
+        except check_utils.BreakInfiniteLoop:
+            pass
+        assert homework_module._tg_queue.qsize() == 1, (
+            'Убедитесь, что при серии одинаковых по причине ошибок бот '
+            'отправляет в Telegram только одно сообщение, даже если текст '
+            'ошибок различается.'
+        )
+
+    def test_main_adapts_poll_interval(
+            self, monkeypatch, random_timestamp, current_timestamp,
+            random_message, homework_module, data_with_new_hw_status
+    ):
+        self.mock_main(
+            monkeypatch,
+            random_message,
+            random_timestamp,
+            current_timestamp,
+            homework_module
+        )
+        monkeypatch.setattr(homework_module, 'MIN_PERIOD', 60)
+        monkeypatch.setattr(homework_module, 'MAX_PERIOD', 1800)
+        monkeypatch.setattr(
+            homework_module, 'enqueue_message', lambda message: True
+        )
+        empty_response = {'homeworks': [], 'current_date': random_timestamp}
+        answers = iter((
+            empty_response,
+            empty_response,
+            empty_response,
+            data_with_new_hw_status,
+            empty_response
+        ))
+        sleeps = []
+
+        def sleep_to_interrupt(secs):
+            sleeps.append(secs)
+            if len(sleeps) == 5:
+                raise check_utils.BreakInfiniteLoop('break')
+
+        monkeypatch.setattr(
+            homework_module, 'get_api_answer', lambda timestamp: next(answers)
+        )
+        monkeypatch.setattr(time, 'monotonic', lambda: 0)
+        monkeypatch.setattr(time, 'sleep', sleep_to_interrupt)
+
+        try:
+            homework_module.main()
+        except check_utils.BreakInfiniteLoop:
+            pass
+        assert sleeps == [1200, 1800, 1800, 60, 120], (
+            'Убедитесь, что интервал опроса API удваивается после пустых '
+            'ответов, не превышает `MAX_PERIOD` и сбрасывается до '
+            '`MIN_PERIOD` при изменении статуса.'
+        )
+
+    @pytest.mark.parametrize('periods', ((None, 1800), (0, 1800), (120, 60)))
+    def test_check_periods_invalid(
+            self, monkeypatch, homework_module, periods
+    ):
+        min_period, max_period = periods
+        monkeypatch.setattr(homework_module, 'MIN_PERIOD', min_period)
+        monkeypatch.setattr(homework_module, 'MAX_PERIOD', max_period)
+        try:
+            homework_module.check_periods()
+        except homework_module.ex.InvalidPeriodError:
+            pass
+        else:
+            raise AssertionError(
+                'Убедитесь, что функция `check_periods` выбрасывает '
+                'исключение при некорректных `POLL_MIN`/`POLL_MAX`.'
+            )
+
     def test_main_log_response_whithout_homeworks(
             self, monkeypatch, random_timestamp, current_timestamp,
             random_message, caplog, homework_module
@@ -784,6 +1238,7 @@ class TestHomework:
             self, monkeypatch, random_timestamp, current_timestamp,
             random_message, caplog, homework_module, data_with_new_hw_status
     ):
+        telegram_worker = homework_module._telegram_worker
         self.mock_main(
             monkeypatch,
             random_message,
@@ -793,9 +1248,13 @@ class TestHomework:
             mock_bot=False,
             response_data=data_with_new_hw_status
         )
+        monkeypatch.setattr(homework_module, 'TELEGRAM_RETRY_DELAY', 0)
 
         class MockedBotWithException(check_utils.MockTelegramBot):
+            attempts = 0
+
             def send_message(self, *args, **kwargs):
+                MockedBotWithException.attempts += 1
                 raise telebot.apihelper.ApiException(
                     'Произошла ошибка при отправке сообщения в Telegram.',
                     'send_message',
@@ -821,6 +1280,44 @@ class TestHomework:
                     'Убедитесь, что бот не останавливает работу при '
                     'возникновении ошибки отправки сообщения в Телеграм.'
                 ) from e
+            homework_module._tg_queue.put(None)
+            try:
+                telegram_worker(MockedBotWithException())
+            except Exception as e:
+                raise AssertionError(
+                    'Убедитесь, что обработчик очереди сообщений не '
+                    'останавливается при ошибке отправки в Телеграм.'
+                ) from e
+        assert (
+            MockedBotWithException.attempts
+            == homework_module.TELEGRAM_MAX_ATTEMPTS
+        ), (
+            'Убедитесь, что число попыток отправить сообщение в Телеграм '
+            'ограничено `TELEGRAM_MAX_ATTEMPTS`.'
+        )
+        assert homework_module._tg_queue.empty(), (
+            'Убедитесь, что неотправленное после всех попыток сообщение '
+            'не возвращается в очередь.'
+        )
+
+    def test_stop_on_sigterm(self, monkeypatch, caplog, homework_module):
+        message_queue = queue.Queue()
+        message_queue.put('Test_message_check')
+        monkeypatch.setattr(homework_module, '_tg_queue', message_queue)
+        with check_utils.check_logging(caplog, level=logging.WARNING, message=(
+                'Убедитесь, что при остановке бота логируется количество '
+                'неотправленных сообщений в Telegram.'
+        )):
+            try:
+                homework_module._stop(signal.SIGTERM, None)
+            except SystemExit:
+                pass
+            else:
+                raise AssertionError(
+                    'Убедитесь, что по сигналу `SIGTERM` бот завершается '
+                    'через `SystemExit`, чтобы буфер логов был сохранён '
+                    'в файл.'
+                )
 
     def test_docstrings(self, homework_module):
         for func in self.HOMEWORK_FUNC_WITH_PARAMS_QTY: